@@ -1,6 +1,11 @@
+import ast
 import os
 import re
+import locale
 import sys
+import queue
+import tempfile
+import threading
 import subprocess
 import tkinter as tk
 from tkinter import ttk, messagebox
@@ -13,12 +18,35 @@ client = None  # We'll set this once the user enters their API key
 API_KEY_FILENAME = "api_key.txt"
 PROGRAMS_DIR = "programs"
 ERROR_LOG_FILE = "error_log.txt"  # New constant for error logging
+_last_saved_key = ""  # Key last read from / written to API_KEY_FILENAME
 
 # Simple regex for lines like: "import X" or "from X import Y"
 IMPORT_REGEX = re.compile(r'^\s*(?:from\s+([a-zA-Z0-9_]+)\s+import\s+.*|import\s+([a-zA-Z0-9_]+))')
 
+# First fenced code block in a GPT response, with or without a 'python' tag
+CODE_FENCE_REGEX = re.compile(r"```(?:python)?(.*?)```", re.DOTALL)
+
 # A small list of modules we do NOT prompt for, as they’re almost always installed or built-in
-BLACKLISTED_IMPORTS = {"sys", "os", "re", "subprocess", "tkinter", "importlib"}
+BLACKLISTED_IMPORTS = frozenset({"sys", "os", "re", "subprocess", "tkinter", "importlib"})
+
+# Example partial set of standard-library modules to skip installation
+STANDARD_LIBS = {
+    "abc", "argparse", "asyncio", "base64", "bz2", "calendar", "collections",
+    "concurrent", "contextlib", "copy", "csv", "datetime", "decimal", "enum",
+    "functools", "glob", "hashlib", "heapq", "hmac", "http", "importlib",
+    "io", "itertools", "json", "logging", "math", "numbers", "operator",
+    "os", "pathlib", "pickle", "platform", "plistlib", "pprint", "queue",
+    "random", "re", "selectors", "shutil", "signal", "socket", "sqlite3",
+    "ssl", "stat", "string", "struct", "subprocess", "sys", "tempfile",
+    "time", "tkinter", "traceback", "typing", "unittest", "urllib", "uuid",
+    "xml", "zlib"
+}
+
+# Python 3.10+ ships the full list of stdlib modules; fall back to the partial set above
+STDLIB = getattr(sys, "stdlib_module_names", frozenset(STANDARD_LIBS))
+
+# Everything we never try to pip install, so filtering is one membership test per import
+_SKIP = BLACKLISTED_IMPORTS | STDLIB
 
 META_SYSTEM_PROMPT = """
 You are an advanced AI that will generate a Python program, given specific user details.
@@ -59,145 +87,148 @@ def extract_code_from_response(response_text: str) -> str:
     """
     Extracts the first code block from triple backticks. If none, return entire text.
     """
-    pattern = r"```(?:python)?(.*?)```"
-    matches = re.findall(pattern, response_text, flags=re.DOTALL)
-    if matches:
-        return matches[0].strip()
+    match = CODE_FENCE_REGEX.search(response_text)
+    if match:
+        return match.group(1).strip()
     else:
         return response_text.strip()
 
 
+# Resolve and create the programs folder once at startup instead of on every save
+_PROGRAMS_ABS = os.path.abspath(PROGRAMS_DIR)
+os.makedirs(_PROGRAMS_ABS, exist_ok=True)
+
 def save_code_to_file(filename: str, code: str) -> str:
     """
-    Saves code in programs/<filename>.py. Creates the 'programs' folder
-    if needed, and returns the *absolute* path.
+    Saves code in programs/<filename>.py (atomically) and returns the *absolute* path.
     """
-    # 1) Convert 'programs' to absolute path
-    abs_dir = os.path.abspath(PROGRAMS_DIR)
-
-    # 2) Create the directory if it doesn't exist
-    os.makedirs(abs_dir, exist_ok=True)
-
-    # 3) Ensure filename ends with .py
+    # 1) Ensure filename ends with .py
     if not filename.lower().endswith(".py"):
         filename += ".py"
 
-    # 4) Full path to the file
-    final_path = os.path.join(abs_dir, filename)
+    # 2) Full path to the file
+    final_path = os.path.join(_PROGRAMS_ABS, filename)
 
-    # 5) Write the file
-    with open(final_path, "w", encoding="utf-8") as f:
-        f.write(code)
+    # 3) Write to a temp file next to it, then atomically swap it in so a
+    #    reader never sees a half-written script
+    tmp_path = final_path + ".tmp"
+    try:
+        try:
+            f = open(tmp_path, "w", encoding="utf-8")
+        except FileNotFoundError:
+            # The programs folder was deleted while the app was running
+            os.makedirs(_PROGRAMS_ABS, exist_ok=True)
+            f = open(tmp_path, "w", encoding="utf-8")
+        with f:
+            f.write(code)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        # Don't leave a stray .tmp file behind in programs/
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
 
-    # 6) Return the absolute path
+    # 4) Return the absolute path
     return final_path
 
 def load_api_key_from_file() -> str:
     """
     Load the API key from api_key.txt if present, else return empty string.
     """
-    if os.path.exists(API_KEY_FILENAME):
+    global _last_saved_key
+    try:
         with open(API_KEY_FILENAME, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    return ""
+            _last_saved_key = f.read().strip()
+    except FileNotFoundError:
+        _last_saved_key = ""
+    return _last_saved_key
 
 def save_api_key_locally(api_key: str) -> None:
     """
-    Save the given API key into api_key.txt.
+    Save the given API key into api_key.txt, unless that key is already saved.
     """
+    global _last_saved_key
+    api_key = api_key.strip()
+    if api_key == _last_saved_key:
+        return
     with open(API_KEY_FILENAME, "w", encoding="utf-8") as f:
-        f.write(api_key.strip())
+        f.write(api_key)
+    _last_saved_key = api_key
+
+def forget_api_key_locally() -> None:
+    """
+    Remove api_key.txt if it exists.
+    """
+    global _last_saved_key
+    try:
+        os.remove(API_KEY_FILENAME)
+    except FileNotFoundError:
+        pass
+    _last_saved_key = ""
 
 # Store logs in a directory called 'logs'
 ERROR_LOG_FILE = "logs/error_log.txt"
 
-def log_error(message: str):
-    """Append an error message to the error log file. Create the file (and directory) if needed."""
-    # Determine the directory portion of the path
-    dir_name = os.path.dirname(ERROR_LOG_FILE)
+# Create the log directory once at startup instead of on every log line
+_LOG_DIR = os.path.dirname(ERROR_LOG_FILE)
+if _LOG_DIR:
+    os.makedirs(_LOG_DIR, exist_ok=True)
 
-    # Create the directory if it doesn't exist
-    if dir_name:
-        os.makedirs(dir_name, exist_ok=True)
-    
+def log_error(message: str):
+    """Append an error message to the error log file. Create the file if needed."""
     # Open in append mode; this will create the file if it doesn't exist
-    with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
+    try:
+        f = open(ERROR_LOG_FILE, "a", encoding="utf-8")
+    except FileNotFoundError:
+        # The logs folder was deleted while the app was running
+        os.makedirs(_LOG_DIR, exist_ok=True)
+        f = open(ERROR_LOG_FILE, "a", encoding="utf-8")
+    with f:
         f.write(message + "\n")
 
 ###############################################################################
-# IMPORT PARSING & INSTALL LOGIC
+# IMPORT PARSING
 ###############################################################################
 def parse_imports(code: str) -> set:
     """
-    Naive approach: match lines with 'import X' or 'from X import Y'.
-    Return a set of top-level package names.
+    Parse the code once with 'ast' and collect top-level package names from
+    every 'import X' / 'from X import Y' node (including 'import a, b' and
+    imports nested in functions or try blocks). Relative imports are ignored.
+    Falls back to the line regex if the generated code doesn't parse.
+    Blacklisted and standard library modules are filtered out.
     """
     found = set()
-    for line in code.splitlines():
-        match = IMPORT_REGEX.match(line)
-        if match:
-            pkg = match.group(1) or match.group(2)
-            if pkg:
-                # Only take top-level (e.g. 'requests' from 'requests.models')
-                top = pkg.split('.')[0]
-                found.add(top)
-    return found
-
-def install_or_upgrade_package(package: str):
-    """
-    Attempt to install or upgrade 'package' using 'pip install --upgrade <package>'.
-    Parse the output; if we see 'Requirement already satisfied', 
-    we tell the user it's already installed. Otherwise, we confirm success or show error.
-    """
-    cmd = [sys.executable, "-m", "pip", "install", "--upgrade", package]
-    process = subprocess.run(cmd, capture_output=True, text=True)
-    
-    # Check the output
-    if process.returncode == 0:
-        stdout_lower = process.stdout.lower()
-        if "requirement already satisfied" in stdout_lower:
-            messagebox.showinfo(
-                "Package Check",
-                f"'{package}' is already installed (requirement already satisfied)."
-            )
-        else:
-            messagebox.showinfo("Installation Success", f"Successfully installed/upgraded '{package}'.")
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        for line in code.splitlines():
+            match = IMPORT_REGEX.match(line)
+            if match:
+                pkg = match.group(1) or match.group(2)
+                if pkg:
+                    found.add(pkg.split('.', 1)[0])
     else:
-        messagebox.showerror(
-            "Installation Failed",
-            f"Failed to install/upgrade '{package}'.\n\n{process.stderr}"
-        )
-
-def maybe_install_dependencies(code: str):
-    """
-    Naively parse imports, for each import not in BLACKLISTED_IMPORTS,
-    ask user if they want to run 'pip install --upgrade <package>'.
-    """
-    imports = parse_imports(code)
-    if not imports:
-        return  # no imports, nothing to do
-
-    for pkg in imports:
-        if pkg in BLACKLISTED_IMPORTS:
-            # skip these as we assume they're standard or built-in
-            continue
-
-        answer = messagebox.askyesno(
-            "Dependency Detected",
-            f"This script imports '{pkg}'.\n\nInstall or upgrade '{pkg}' via pip now?"
-        )
-        if answer:
-            install_or_upgrade_package(pkg)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                # Only take top-level (e.g. 'requests' from 'requests.models')
+                found.update(alias.name.split('.', 1)[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                found.add(node.module.split('.', 1)[0])
+    return found - _SKIP
 
 ###############################################################################
 # GPT CALL
 ###############################################################################
-def generate_program_code(title: str, description: str, inputs: str, outputs: str, error_context: str = "") -> str:
+def generate_program_code(title: str, description: str, inputs: str, outputs: str, error_context: str = "",
+                          on_progress=None) -> str:
     """
     1) Build system prompt
-    2) Send to model
+    2) Stream the response from the model, stopping once the code block is closed
     3) Extract code from triple backticks
     4) If an error happened before, provide context to GPT
+    'on_progress', if given, is called with the number of characters received so far.
     """
     if client is None:
         raise RuntimeError("API client not initialized. Please set your API key first.")
@@ -208,17 +239,41 @@ def generate_program_code(title: str, description: str, inputs: str, outputs: st
         system_prompt += f"\n\nPrevious attempt failed with this error:\n{error_context}"
 
     try:
-        response = client.chat.completions.create(
+        with client.chat.completions.create(
             model="o3-mini",
             reasoning_effort="medium",
-            messages=[{"role": "system", "content": system_prompt}]
-        )
+            messages=[{"role": "system", "content": system_prompt}],
+            stream=True
+        ) as response:
+            raw_output = ""
+            fences = 0
+            search_from = 0
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if not delta:
+                    continue
+                raw_output += delta
+                if on_progress:
+                    on_progress(len(raw_output))
+
+                # Only scan the new text (plus 2 chars back, for a fence split across chunks)
+                while True:
+                    idx = raw_output.find("```", search_from)
+                    if idx == -1:
+                        search_from = max(search_from, len(raw_output) - 2)
+                        break
+                    fences += 1
+                    search_from = idx + 3
+                if fences >= 2:
+                    # The code block is complete; leaving the 'with' closes the stream
+                    break
 
-        if not response or not response.choices or not response.choices[0].message.content:
+        if not raw_output:
             log_error("GPT response was empty or invalid.")
             raise RuntimeError("OpenAI API returned an empty response.")
 
-        raw_output = response.choices[0].message.content
         return extract_code_from_response(raw_output)
 
     except Exception as e:
@@ -229,10 +284,6 @@ def generate_program_code(title: str, description: str, inputs: str, outputs: st
 # CLEAR PROGRAMS
 ###############################################################################
 def delete_all_programs():
-    if not os.path.isdir(PROGRAMS_DIR):
-        messagebox.showinfo("Info", f"No '{PROGRAMS_DIR}' directory found.")
-        return
-
     confirm = messagebox.askyesno(
         "Confirm Deletion",
         f"Are you sure you want to delete all files in '{PROGRAMS_DIR}'?"
@@ -242,11 +293,18 @@ def delete_all_programs():
 
     try:
         count_deleted = 0
-        for filename in os.listdir(PROGRAMS_DIR):
-            file_path = os.path.join(PROGRAMS_DIR, filename)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-                count_deleted += 1
+        try:
+            entries = os.scandir(_PROGRAMS_ABS)
+        except FileNotFoundError:
+            # The programs folder was deleted while the app was running
+            messagebox.showinfo("Info", f"No '{PROGRAMS_DIR}' directory found.")
+            return
+        # DirEntry caches the file type, so no extra stat per entry
+        with entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    os.remove(entry.path)
+                    count_deleted += 1
 
         messagebox.showinfo("Success", f"Deleted {count_deleted} file(s) from '{PROGRAMS_DIR}'.")
     except Exception as e:
@@ -256,7 +314,7 @@ def delete_program(filename: str):
     """
     Deletes a specific program file before retrying a new generation.
     """
-    file_path = os.path.join(PROGRAMS_DIR, filename)
+    file_path = os.path.join(_PROGRAMS_ABS, filename)
     if os.path.exists(file_path):
         try:
             os.remove(file_path)
@@ -317,8 +375,7 @@ def set_api_key():
         if remember_var.get():
             save_api_key_locally(user_key)
         else:
-            if os.path.exists(API_KEY_FILENAME):
-                os.remove(API_KEY_FILENAME)
+            forget_api_key_locally()
         messagebox.showinfo("Success", "API Key set successfully!")
     except Exception as e:
         messagebox.showerror("Error", f"Could not set API key: {e}")
@@ -356,10 +413,176 @@ bottom_frame = ttk.Frame(root, padding="10 10 10 10")
 bottom_frame.pack(side=tk.BOTTOM, fill=tk.X)
 
 
+def _generation_worker(title_val, desc_val, inputs_val, outputs_val, error_context, result_queue):
+    """
+    Runs on a background thread: generates the code with GPT, installs its
+    dependencies and saves it. Results are pushed onto 'result_queue' so that
+    all Tk calls stay on the main thread.
+    """
+    try:
+        # 1) Generate code (using GPT, possibly with error context)
+        code = generate_program_code(
+            title_val, desc_val, inputs_val, outputs_val, error_context,
+            on_progress=lambda received: result_queue.put(("progress", received))
+        )
+        result_queue.put(("status", "Installing dependencies..."))
+        install_result = maybe_install_dependencies(code=code)
+        if install_result:
+            succeeded, summary = install_result
+            if succeeded:
+                result_queue.put(("info", "Dependencies", summary))
+            else:
+                result_queue.put(("error", "Installation Failed", summary))
+
+        # 2) Save the code
+        final_path = save_code_to_file(title_val, code)
+        result_queue.put(("saved", final_path))
+    except Exception as ex:
+        result_queue.put(("err", str(ex)))
+
+def _start_generation(title_val, desc_val, inputs_val, outputs_val, error_context=""):
+    """Start a generation attempt on a worker thread and begin polling for its result."""
+    result_queue = queue.Queue()
+    status_var.set("Generating...")
+    threading.Thread(
+        target=_generation_worker,
+        args=(title_val, desc_val, inputs_val, outputs_val, error_context, result_queue),
+        daemon=True
+    ).start()
+    root.after(100, _poll_generation, result_queue, (title_val, desc_val, inputs_val, outputs_val))
+
+def _finish_generation():
+    generate_button.config(state=tk.NORMAL)
+    status_var.set("")
+
+def _poll_generation(result_queue, details):
+    """
+    Drains the worker's queue on the main thread. Once the program is saved,
+    it is started with Popen and watched by _poll_program.
+    """
+    while True:
+        try:
+            item = result_queue.get_nowait()
+        except queue.Empty:
+            root.after(100, _poll_generation, result_queue, details)
+            return
+
+        kind = item[0]
+        if kind == "progress":
+            status_var.set(f"Generating... {item[1]} characters received")
+        elif kind == "status":
+            status_var.set(item[1])
+        elif kind == "info":
+            messagebox.showinfo(item[1], item[2])
+        elif kind == "error":
+            messagebox.showerror(item[1], item[2])
+        elif kind == "err":
+            messagebox.showerror("Error", item[1])
+            log_error(f"Unexpected failure: {item[1]}")
+            # Stop if there's an unexpected exception (like network/API failure)
+            _finish_generation()
+            return
+        elif kind == "saved":
+            final_path = item[1]
+            messagebox.showinfo("Success", f"Program generated and saved as:\n{final_path}")
+            stdout_file = stderr_file = None
+            try:
+                # 3) Run the generated script; output goes to temp files so a
+                #    chatty program can't block on a full pipe
+                stdout_file = tempfile.TemporaryFile()
+                stderr_file = tempfile.TemporaryFile()
+                process = subprocess.Popen(
+                    [sys.executable, final_path],
+                    stdout=stdout_file, stderr=stderr_file,
+                    cwd=os.path.dirname(final_path)
+                )
+            except Exception as ex:
+                for f in (stdout_file, stderr_file):
+                    if f is not None:
+                        f.close()
+                messagebox.showerror("Error", str(ex))
+                log_error(f"Unexpected failure: {ex}")
+                _finish_generation()
+                return
+            status_var.set("Running program...")
+            root.after(100, _poll_program, process, stdout_file, stderr_file, details)
+            return
+
+def _poll_program(process, stdout_file, stderr_file, details):
+    """
+    Checks (without blocking) whether the generated program has exited, then
+    reports its output or error and optionally starts a retry.
+    """
+    returncode = process.poll()
+    if returncode is None:
+        root.after(100, _poll_program, process, stdout_file, stderr_file, details)
+        return
+
+    try:
+        retry_context = _report_program_result(returncode, stdout_file, stderr_file, details[0])
+    except Exception as ex:
+        messagebox.showerror("Error", str(ex))
+        log_error(f"Unexpected failure: {ex}")
+        retry_context = None
+    finally:
+        stdout_file.close()
+        stderr_file.close()
+
+    if retry_context is not None:
+        # New GPT generation with the error as context
+        _start_generation(*details, error_context=retry_context)
+    else:
+        _finish_generation()
+
+def _decode_output(output_file) -> str:
+    """Read back a child's output file, decoding it with the locale encoding like text=True did."""
+    output_file.seek(0)
+    return output_file.read().decode(locale.getpreferredencoding(False), errors="replace")
+
+def _report_program_result(returncode, stdout_file, stderr_file, title_val):
+    """
+    Shows the generated program's output or error. Returns the error context
+    if the user chose to regenerate, else None.
+    """
+    stdout, stderr = _decode_output(stdout_file), _decode_output(stderr_file)
+
+    # 4) Check success/failure
+    if returncode == 0:
+        # -- Success --
+        out_msg = stdout.strip() or "(No output)"
+        messagebox.showinfo(
+            "Program Output",
+            f"Program finished execution.\n\nOutput:\n{out_msg}"
+        )
+        return None
+
+    # -- Failure --
+    error_context = stderr.strip() or "(No error message)"
+    log_error(f"Error in '{title_val}': {error_context}")
+    messagebox.showerror(
+        "Program Error",
+        f"Program exited with an error.\n\nDetails:\n{error_context}"
+    )
+
+    # Ask user whether to retry (and thus re-generate)
+    retry = messagebox.askyesno(
+        "Retry Generation?",
+        "Do you want to delete this failing script and regenerate a new one?"
+    )
+    if not retry:
+        # 4B) Do NOT delete the file; just stop
+        return None
+
+    # 4A) Delete only if we're going to retry
+    delete_program(title_val)
+    messagebox.showinfo("Retrying", "The program encountered an error and will be regenerated.")
+    return error_context
+
 def on_generate_button_click():
     """
     Handles the button click to generate a program, run it, and optionally retry dynamically if it fails.
     Only deletes the script if the user explicitly chooses to retry after an error.
+    The GPT call and the generated program run in the background so the window stays responsive.
     """
     title_val = entry_title.get().strip()
     desc_val = text_description.get("1.0", tk.END).strip()
@@ -370,59 +593,8 @@ def on_generate_button_click():
         messagebox.showerror("Error", "Please provide a Program Title.")
         return
 
-    error_context = ""  # This will store error messages for GPT if we retry
-
-    while True:
-        try:
-            # 1) Generate code (using GPT, possibly with error context)
-            code = generate_program_code(title_val, desc_val, inputs_val, outputs_val, error_context)
-            maybe_install_dependencies(code=code)
-
-            # 2) Save the code
-            final_path = save_code_to_file(title_val, code)
-            messagebox.showinfo("Success", f"Program generated and saved as:\n{final_path}")
-            script_dir = os.path.dirname(final_path)
-            # 3) Run the generated script
-            run_result = subprocess.run([sys.executable, final_path], capture_output=True, text=True, cwd=script_dir)
-
-            # 4) Check success/failure
-            if run_result.returncode == 0:
-                # -- Success --
-                out_msg = run_result.stdout.strip() or "(No output)"
-                messagebox.showinfo(
-                    "Program Output",
-                    f"Program finished execution.\n\nOutput:\n{out_msg}"
-                )
-                # Exit the loop on success
-                break
-            else:
-                # -- Failure --
-                error_context = run_result.stderr.strip() or "(No error message)"
-                log_error(f"Error in '{title_val}': {error_context}")
-                messagebox.showerror(
-                    "Program Error",
-                    f"Program exited with an error.\n\nDetails:\n{error_context}"
-                )
-
-                # Ask user whether to retry (and thus re-generate)
-                retry = messagebox.askyesno(
-                    "Retry Generation?",
-                    "Do you want to delete this failing script and regenerate a new one?"
-                )
-                if retry:
-                    # 4A) Delete only if we're going to retry
-                    delete_program(title_val)
-                    messagebox.showinfo("Retrying", "The program encountered an error and will be regenerated.")
-                    # Loop continues => new GPT generation
-                else:
-                    # 4B) Do NOT delete the file; just exit the loop
-                    break
-
-        except Exception as ex:
-            messagebox.showerror("Error", str(ex))
-            log_error(f"Unexpected failure: {ex}")
-            # Exit the loop if there's an unexpected exception (like network/API failure)
-            break
+    generate_button.config(state=tk.DISABLED)
+    _start_generation(title_val, desc_val, inputs_val, outputs_val)
 
 
 generate_button = ttk.Button(bottom_frame, text="Generate Program", command=on_generate_button_click)
@@ -431,64 +603,120 @@ generate_button.pack(side=tk.RIGHT, padx=5)
 clear_button = ttk.Button(bottom_frame, text="Delete All Programs", command=delete_all_programs)
 clear_button.pack(side=tk.LEFT, padx=5)
 
+status_var = tk.StringVar(value="")
+status_label = ttk.Label(bottom_frame, textvariable=status_var)
+status_label.pack(side=tk.LEFT, padx=5)
+
 ###############################################################################
 # DEPENDENCY INSTALLATION LOGIC (UPGRADE)
 ###############################################################################
 
-# Example partial set of standard-library modules to skip installation
-STANDARD_LIBS = {
-    "abc", "argparse", "asyncio", "base64", "bz2", "calendar", "collections",
-    "concurrent", "contextlib", "copy", "csv", "datetime", "decimal", "enum",
-    "functools", "glob", "hashlib", "heapq", "hmac", "http", "importlib",
-    "io", "itertools", "json", "logging", "math", "numbers", "operator",
-    "os", "pathlib", "pickle", "platform", "plistlib", "pprint", "queue",
-    "random", "re", "selectors", "shutil", "signal", "socket", "sqlite3",
-    "ssl", "stat", "string", "struct", "subprocess", "sys", "tempfile",
-    "time", "tkinter", "traceback", "typing", "unittest", "urllib", "uuid",
-    "xml", "zlib"
-}
-
-def is_standard_library(package_name: str) -> bool:
-    """
-    Checks if 'package_name' is recognized as part of the Python standard library.
-    You can expand or refine this set as needed.
-    """
-    return package_name.lower() in STANDARD_LIBS
-
 def maybe_install_dependencies(code: str):
     """
     Parses 'import X' lines, skipping blacklisted or standard library modules.
-    Automatically installs missing packages without asking the user.
-    If installation fails, logs the error and moves to the next package.
+    Automatically installs missing packages without asking the user, batching
+    them into a single pip run. Returns the (succeeded, summary) result of
+    install_or_upgrade_packages, or None if nothing needed installing.
     """
-    imports_found = parse_imports(code)  # <-- This should be defined in your HELPER FUNCTIONS
-    if not imports_found:
-        return
+    # parse_imports already drops blacklisted and standard library modules
+    to_install = sorted(parse_imports(code))
+    if to_install:
+        return install_or_upgrade_packages(to_install)
+    return None
 
-    for pkg in imports_found:
-        # Skip blacklisted and standard library modules
-        if pkg in BLACKLISTED_IMPORTS or is_standard_library(pkg):
-            continue
+# Skip pip's PyPI version probe and don't write __pycache__ for pip's own modules
+PIP_ENV = {**os.environ, "PIP_DISABLE_PIP_VERSION_CHECK": "1", "PYTHONDONTWRITEBYTECODE": "1"}
 
-        install_or_upgrade_package(pkg)  # Install package automatically
+def _normalize_package_name(name: str) -> str:
+    """Normalize a package name the way pip does ('Foo_Bar' -> 'foo-bar')."""
+    return re.sub(r"[-_.]+", "-", name).lower()
 
-def install_or_upgrade_package(package: str):
+def _run_pip_install(packages: list) -> tuple:
     """
-    Attempts to install or upgrade a package using 'pip install --upgrade <package>'.
-    - If successful, logs success.
-    - If it fails, logs the failure and continues without stopping execution.
+    Runs one 'pip install --upgrade ...' for 'packages' and parses its output.
+    Returns (process, installed, satisfied) with normalized package names.
     """
-    cmd = [sys.executable, "-m", "pip", "install", "--upgrade", package]
-    process = subprocess.run(cmd, capture_output=True, text=True)
+    cmd = [sys.executable, "-m", "pip", "install", "--upgrade",
+           "--disable-pip-version-check", "--no-input", *packages]
+    process = subprocess.run(cmd, capture_output=True, text=True, env=PIP_ENV)
+
+    installed = set()
+    satisfied = set()
+    for line in process.stdout.splitlines():
+        line = line.strip()
+        if line.startswith("Successfully installed "):
+            # e.g. "Successfully installed requests-2.31.0 urllib3-2.2.1"
+            for dist in line[len("Successfully installed "):].split():
+                installed.add(_normalize_package_name(dist.rsplit("-", 1)[0]))
+        elif line.startswith("Requirement already satisfied: "):
+            # e.g. "Requirement already satisfied: requests in /site-packages (2.31.0)"
+            name = re.split(r"[\s<>=!~;\[(]", line[len("Requirement already satisfied: "):], 1)[0]
+            satisfied.add(_normalize_package_name(name))
+    return process, installed, satisfied
+
+# Names pip reports when a requirement can't be found on the index
+PIP_NOT_FOUND_REGEX = re.compile(
+    r"(?:No matching distribution found for|Could not find a version that satisfies the requirement)"
+    r"\s+([A-Za-z0-9][A-Za-z0-9._-]*)"
+)
 
+def _classify(package: str, process, installed: set, satisfied: set) -> str:
+    """Status of 'package' after a pip run that covered it."""
+    name = _normalize_package_name(package)
+    if name in satisfied and name not in installed:
+        return "already installed"
     if process.returncode == 0:
-        stdout_lower = process.stdout.lower()
-        if "requirement already satisfied" in stdout_lower:
-            log_error(f"'{package}' is already installed.")
-        else:
-            log_error(f"Successfully installed/upgraded '{package}'.")
-    else:
-        log_error(f"Failed to install '{package}': {process.stderr.strip()}")
+        return "installed/upgraded"
+    return "failed"
+
+def install_or_upgrade_packages(packages: list) -> tuple:
+    """
+    Installs or upgrades all 'packages' with one 'pip install --upgrade ...' run.
+    pip resolves the whole batch before installing anything, so if one import
+    name isn't on PyPI nothing gets installed. The names pip reports as not
+    found are dropped and the rest is re-run as one batch, until it succeeds.
+    Only if pip's error names none of the packages are they tried one by one.
+    Returns (succeeded, summary) for the caller to display; no Tk calls are
+    made here since this runs on the worker thread.
+    """
+    status = {}
+    errors = []
+    pending = list(packages)
+    while pending:
+        process, installed, satisfied = _run_pip_install(pending)
+        if process.returncode == 0:
+            for package in pending:
+                status[package] = _classify(package, process, installed, satisfied)
+            break
+
+        not_found = {_normalize_package_name(name) for name in PIP_NOT_FOUND_REGEX.findall(process.stderr)}
+        failed = [pkg for pkg in pending if _normalize_package_name(pkg) in not_found]
+        if not failed:
+            # Can't tell which package broke the batch; fall back to one run each
+            for package in pending:
+                single, single_installed, single_satisfied = _run_pip_install([package])
+                status[package] = _classify(package, single, single_installed, single_satisfied)
+                if single.returncode != 0:
+                    errors.append(f"{package}: {single.stderr.strip()}")
+            break
+
+        for package in failed:
+            status[package] = "failed"
+        errors.append(process.stderr.strip())
+        pending = [pkg for pkg in pending if pkg not in failed]
+
+    summary = []
+    for package in packages:
+        log_error(f"'{package}': {status[package]}.")
+        summary.append(f"{package}: {status[package]}")
+
+    if errors:
+        log_error("pip install failed:\n" + "\n".join(errors))
+        return False, (
+            "Some packages could not be installed.\n\n" + "\n".join(summary)
+            + "\n\n" + "\n\n".join(errors)
+        )
+    return True, "\n".join(summary)
 
 
 ###############################################################################